@@ -100,6 +100,17 @@ pub mod python_api {
             Ok(())
         }
 
+        #[pyo3(signature = (tasks, callback, my_device_name=None))]
+        fn send_files_batch(&self, py: Python, tasks: Vec<(String, u16, String, String, Option<String>)>, callback: PyObject, my_device_name: Option<String>) -> PyResult<()> {
+            let core_guard = self.core.read().unwrap();
+            let my_name = my_device_name.unwrap_or_else(|| utils::get_system_name());
+            for (ip, port, file_path, task_id, target_os) in tasks {
+                let task_handler = PyEventHandler { callback: callback.clone_ref(py), rt: self.rt.handle().clone() };
+                core_guard.send_file(ip, port, file_path, task_id, my_name.clone(), Box::new(task_handler), target_os);
+            }
+            Ok(())
+        }
+
         fn resolve_request(&self, task_id: String, accept: bool) -> PyResult<()> {
             self.core.read().unwrap().resolve_request(task_id, accept);
             Ok(())
@@ -124,13 +135,13 @@ pub mod python_api {
     }
 
     #[pyfunction] 
-    fn compress_folder(_py: Python, f: String, z: String) -> PyResult<bool> { 
-        utils::compress_folder(f, z).map_err(|e| pyo3::exceptions::PyIOError::new_err(e.to_string())) 
+    fn compress_folder(py: Python, f: String, z: String) -> PyResult<bool> { 
+        py.allow_threads(|| utils::compress_folder(f, z)).map_err(|e| pyo3::exceptions::PyIOError::new_err(e.to_string())) 
     }
 
     #[pyfunction] 
-    fn extract_zip(_py: Python, z: String, e: String) -> PyResult<bool> { 
-        utils::extract_zip(z, e).map_err(|e| pyo3::exceptions::PyIOError::new_err(e.to_string())) 
+    fn extract_zip(py: Python, z: String, e: String) -> PyResult<bool> { 
+        py.allow_threads(|| utils::extract_zip(z, e)).map_err(|e| pyo3::exceptions::PyIOError::new_err(e.to_string())) 
     }
 
     #[pyfunction] 
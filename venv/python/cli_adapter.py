@@ -0,0 +1,461 @@
+import sys
+import os
+import asyncio
+import time
+import threading
+import logging
+import functools
+import math
+import ctypes
+import ctypes.util
+import psutil
+from rich.console import Console
+from rich.panel import Panel
+from rich.text import Text
+from rich import box
+from events import TransferEvents
+
+from utility import draw_ascii_bar, format_bytes
+
+logger = logging.getLogger("CLI")
+
+# The same path shows up in on_task_added and again in on_start (and on
+# re-queues), so split each one only once
+_basename = functools.lru_cache(maxsize=256)(os.path.basename)
+
+CLOCK_MONOTONIC = 1
+
+# Return to column 0 and erase the progress line (ANSI EL)
+_CLEAR_LINE = "\r\x1b[2K"
+
+class _Timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+class _Itimerspec(ctypes.Structure):
+    _fields_ = [("it_interval", _Timespec), ("it_value", _Timespec)]
+
+def _load_libc():
+    # timerfd is Linux-only; other platforms use the monotonic deadline fallback
+    if not sys.platform.startswith("linux"): return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.timerfd_create.argtypes = [ctypes.c_int, ctypes.c_int]
+        libc.timerfd_settime.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.POINTER(_Itimerspec), ctypes.c_void_p]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+_libc = _load_libc()
+
+class ResourceMonitor:
+    """Background thread to monitor CPU & RAM usage specific to this process."""
+    def __init__(self, pid, busy_interval=0.2, idle_interval=2.0, quiet_after=2.0):
+        self.process = psutil.Process(pid)
+        # Poll fast while a transfer is moving, back off when it goes quiet
+        self.busy_interval = busy_interval
+        self.idle_interval = idle_interval
+        self.quiet_after = quiet_after # no set_busy(True) for this long -> idle
+        self._busy = True
+        self._last_active = time.monotonic()
+        self._warned = False # sampling failure logged once
+        self._stop = threading.Event()
+        # Running (samples, cpu sum, mem sum), replaced as one tuple so readers
+        # on other threads never pair a new count with old sums
+        self._totals = (0, 0.0, 0)
+        self._cpu_max = 0.0
+        self._mem_max = 0
+        # cpu_percent() keeps its baseline on the Process; task_started() and
+        # the sampler thread both touch it
+        self._lock = threading.Lock()
+        self.thread = None
+        self.fd = None
+
+    def start(self):
+        self._stop.clear()
+        self.fd = self._open_timer()
+        self.thread = threading.Thread(target=self._monitor_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+        # Expire the timer now so a read blocked on a 2 s idle period returns
+        if self.fd is not None: self._arm_timer(self.fd, oneshot_ns=1)
+        if self.thread:
+            self.thread.join(timeout=1.0)
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    @property
+    def interval(self):
+        return self.busy_interval if self._busy else self.idle_interval
+
+    def set_busy(self, busy):
+        if busy: self._last_active = time.monotonic()
+        if busy == self._busy: return
+        self._busy = busy
+        fd = self.fd
+        if fd is not None: self._arm_timer(fd)
+
+    def _open_timer(self):
+        """Periodic timerfd on CLOCK_MONOTONIC, or None when unavailable."""
+        if _libc is None: return None
+        fd = _libc.timerfd_create(CLOCK_MONOTONIC, 0)
+        if fd < 0: return None
+        if not self._arm_timer(fd):
+            os.close(fd)
+            return None
+        return fd
+
+    def _arm_timer(self, fd, oneshot_ns=None):
+        if oneshot_ns is None:
+            sec, nsec = divmod(int(self.interval * 1_000_000_000), 1_000_000_000)
+            period = _Timespec(sec, nsec)
+            spec = _Itimerspec(period, period)
+        else:
+            spec = _Itimerspec(_Timespec(0, 0), _Timespec(0, oneshot_ns))
+        return _libc.timerfd_settime(fd, 0, ctypes.byref(spec), None) == 0
+
+    def _sample(self):
+        with self._lock:
+            # oneshot() parses /proc/<pid> once for both reads
+            with self.process.oneshot():
+                cpu = self.process.cpu_percent(interval=None)
+                mem = self.process.memory_info().rss
+            n, cpu_sum, mem_sum = self._totals
+            self._totals = (n + 1, cpu_sum + cpu, mem_sum + mem)
+            if cpu > self._cpu_max: self._cpu_max = cpu
+            if mem > self._mem_max: self._mem_max = mem
+
+    def _monitor_loop(self):
+        # Initial call to reset cpu counters
+        try: self.process.cpu_percent()
+        except: pass
+        
+        # 🔥 Fix: sleep(0.5) drifts under load and skews the stability metric,
+        # so wake on a fixed monotonic schedule instead
+        next_deadline = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                # Monitor specifically the current process
+                self._sample()
+                # A stalled transfer never reaches a terminal event to idle us
+                if self._busy and time.monotonic() - self._last_active > self.quiet_after:
+                    self.set_busy(False)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                break
+            except Exception as e:
+                # /proc reads can come back truncated under heavy load; skip the
+                # sample and back off rather than let the thread die silently
+                if not self._warned:
+                    self._warned = True
+                    logger.warning(f"Resource sampling failed, retrying: {e!r}")
+                if self._stop.wait(1.0): break
+                next_deadline = time.monotonic()
+                continue
+
+            if self.fd is not None:
+                try: os.read(self.fd, 8) # blocks until next expiration
+                except OSError: break
+            else:
+                next_deadline += self.interval
+                # Event.wait doubles as the sleep and returns early on stop()
+                if self._stop.wait(max(0, next_deadline - time.monotonic())): break
+
+    def task_started(self):
+        """Restart the CPU baseline at a transfer's start; returns a snapshot()."""
+        # Otherwise the next sample would average in the idle time before it
+        with self._lock:
+            try: self.process.cpu_percent()
+            except Exception: pass
+        self.set_busy(True)
+        return self._totals
+
+    def snapshot(self):
+        """(samples, cpu total, mem total) so far; pass to stats_since() later."""
+        return self._totals
+
+    def stats_since(self, snap):
+        """Averages over the samples taken after snap; maxima are monitor-lifetime."""
+        n0, cpu0, mem0 = snap
+        if self._totals[0] <= n0:
+            # Finished before the sampler ran: one sample covers the whole transfer
+            try: self._sample()
+            except Exception: return None
+        n, cpu, mem = self._totals
+        if n <= n0: return None
+        return {
+            'avg_cpu': (cpu - cpu0) / (n - n0),
+            'max_cpu': self._cpu_max,
+            'avg_mem': (mem - mem0) / (n - n0),
+            'max_mem': self._mem_max
+        }
+
+    def get_stats(self):
+        n, cpu, mem = self._totals
+        if not n: return None
+        return {
+            'avg_cpu': cpu / n,
+            'max_cpu': self._cpu_max,
+            'avg_mem': mem / n,
+            'max_mem': self._mem_max
+        }
+
+class _TaskMeta:
+    """Per-transfer progress state; slots keep it small and attribute access fast."""
+    __slots__ = ('start_ns', 'filename', 'total', 'total_str', 'peak_speed', 'n', 'mean', 'M2',
+                 'last_update_ns', 'last_bytes', 'next_draw_ns', 'last_frame', 'last_decile', 'ema_bps', 'mon_snap')
+
+    def __init__(self, filename, now_ns):
+        self.start_ns = now_ns
+        self.filename = filename
+        self.total = 0
+        self.total_str = format_bytes(0)
+        self.peak_speed = 0.0
+        # Welford accumulators for the speed samples
+        self.n = 0
+        self.mean = 0.0
+        self.M2 = 0.0
+        self.last_update_ns = now_ns
+        self.last_bytes = 0
+        self.next_draw_ns = now_ns
+        self.last_frame = None
+        self.last_decile = -1 # non-TTY output: last 10% step printed
+        self.ema_bps = 0 # displayed speed, integer bytes/s
+        self.mon_snap = None # ResourceMonitor.snapshot() at start (dev mode)
+
+class CLITransferUI(TransferEvents):
+    # Static Panel envelopes; only the body changes per event
+    _INCOMING_PANEL_KW = dict(
+        border_style="green",
+        box=box.ROUNDED,
+        padding=(1, 2),
+        expand=False,
+        subtitle="[dim]Type 'y' to accept[/]"
+    )
+    _SENDING_PANEL_KW = dict(
+        border_style="dim cyan",
+        box=box.ROUNDED,
+        padding=(0, 2),
+        expand=False
+    )
+
+    def __init__(self, console=None, dev_mode=False):
+        self.console = console if console else Console(force_terminal=True)
+        self.dev_mode = dev_mode
+        self.task_meta = {} 
+        self.monitor = None
+        # Dev mode: one monitor for the UI's lifetime, idling between transfers;
+        # each task reports the delta between its start and end snapshots
+        if dev_mode:
+            self.monitor = ResourceMonitor(os.getpid())
+            self.monitor.start()
+            self.monitor.set_busy(False)
+        self._flush_pending = False
+        # Checked once: piped/redirected output gets plain lines, no \r redraws
+        self._is_tty = sys.stdout.isatty()
+        # Only a terminal has a progress line to erase before a report
+        self._clear = _CLEAR_LINE if self._is_tty else ""
+        # System lines are plain writes; colour the tag only on a real terminal
+        self._sys_prefix = "\x1b[1;36mℹ️  System:\x1b[0m " if self._is_tty else "ℹ️  System: "
+
+    def handle_incoming_request(self, task_id, filename, filesize, sender_name, sender_device):
+        short_name = _basename(filename)
+        size_str = format_bytes(int(filesize))
+        
+        # Incoming Request ยังคงใส่กรอบและสีเพื่อให้ User สังเกตเห็นได้ง่าย
+        body = Text.assemble(
+            ("📨 Incoming Request\n", "bold cyan"),
+            "From: ", (sender_name, "yellow"), " ", (f"({sender_device})", "dim"), "\n",
+            "File: ", (short_name, "bold green"), f" ({size_str})"
+        )
+        self.console.print(Panel(body, **self._INCOMING_PANEL_KW))
+
+    def on_task_added(self, task_id, filename, side="SEND"):
+        if side == "SEND":
+            short_name = _basename(filename)
+            body = Text.assemble(
+                ("📤 Sending Request", "bold cyan"), "  ", ("──▷", "dim"), "  ",
+                (short_name, "bold yellow")
+            )
+            self.console.print(Panel(body, **self._SENDING_PANEL_KW))
+
+    def on_start(self, task_id, filename):
+        short_name = _basename(filename)
+        now_ns = time.monotonic_ns()
+        meta = self.task_meta[task_id] = _TaskMeta(short_name, now_ns)
+        if self.monitor: meta.mon_snap = self.monitor.task_started()
+
+    def on_progress(self, task_id, current, total):
+        meta = self.task_meta.get(task_id)
+        if meta is None: return
+
+        # 🔥 Fix: Redraw at most ~30 Hz; fast LAN transfers emit far more
+        # progress events than the terminal can absorb. Final frame always drawn.
+        # Checked first so skipped events cost only a clock read and a compare.
+        now_ns = time.monotonic_ns()
+        if now_ns < meta.next_draw_ns and current != total: return
+        meta.next_draw_ns = now_ns + 33_000_000
+        if total != meta.total:
+            meta.total = total
+            meta.total_str = format_bytes(total) # constant per transfer, format once
+        if self.monitor: self.monitor.set_busy(True)
+
+        # 🔥 Fix: Reduced sampling interval from 0.5s to 0.1s 
+        # to capture peak speed on high-speed LAN transfers
+        dt_ns = now_ns - meta.last_update_ns
+        if dt_ns > 100_000_000:
+            db = current - meta.last_bytes
+            inst_speed = db * 1e9 / dt_ns
+            meta.n += 1
+            delta = inst_speed - meta.mean
+            meta.mean += delta / meta.n
+            meta.M2 += delta * (inst_speed - meta.mean)
+            meta.peak_speed = max(meta.peak_speed, inst_speed)
+            # Display speed: integer EMA with alpha 1/8, seeded by the first sample
+            sample = db * 1_000_000_000 // dt_ns
+            meta.ema_bps = (meta.ema_bps * 7 + sample) >> 3 if meta.n > 1 else sample
+            meta.last_update_ns = now_ns
+            meta.last_bytes = current
+
+        if not self._is_tty:
+            # Not a terminal (pipe, log file): one full line per 10% step
+            if total <= 0: return
+            decile = current * 10 // total
+            if decile <= meta.last_decile: return
+            meta.last_decile = decile
+            sys.stdout.write(f"{meta.filename}: {decile * 10}% ({format_bytes(current)}/{meta.total_str})\n")
+            self._schedule_flush()
+            return
+
+        elapsed = (now_ns - meta.start_ns) / 1e9
+        # Until the first 100 ms sample seeds the EMA, show the average so far
+        speed = meta.ema_bps if meta.n else (int(current / elapsed) if elapsed > 0 else 0)
+        
+        meta.last_frame = draw_ascii_bar(
+            current, total, meta.filename, speed_bps=speed, elapsed=elapsed,
+            total_str=meta.total_str, last_frame=meta.last_frame, flush=False
+        )
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        # Frames drawn in the same loop pass (one progress flush can update
+        # several tasks) share a single stdout flush once the loop is idle
+        if self._flush_pending: return
+        try: loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Called from an engine thread (sender side): nothing to batch with
+            sys.stdout.flush()
+            return
+        self._flush_pending = True
+        loop.call_soon(self._flush_stdout)
+
+    def _flush_stdout(self):
+        self._flush_pending = False
+        sys.stdout.flush()
+
+    def _end_task(self, task_id):
+        meta = self.task_meta.pop(task_id, None)
+        # Drop the monitor to its idle cadence once nothing is moving
+        if self.monitor and not self.task_meta: self.monitor.set_busy(False)
+        return meta
+
+    def on_status_change(self, task_id, status, message=""):
+        if status == "COMPLETED":
+            meta = self._end_task(task_id)
+
+            if meta:
+                total_time = (time.monotonic_ns() - meta.start_ns) / 1e9
+                avg_speed = meta.total / total_time if total_time > 0 else 0
+                
+                if self.dev_mode:
+                    sys_stats = self.monitor.stats_since(meta.mon_snap) if self.monitor else None
+                    self._print_engineering_report(meta, total_time, avg_speed, sys_stats)
+                else:
+                    self._print_simple_report(meta, total_time, avg_speed)
+            else:
+                sys.stdout.write(f"{self._clear}\n✔ Completed: {task_id}\n")
+                
+        elif status == "FAILED":
+            sys.stdout.write(f"{self._clear}\n✘ Failed: {task_id} - {message}\n")
+            sys.stdout.flush()
+            self._end_task(task_id)
+
+    def _print_simple_report(self, meta, total_time, avg_speed):
+        sys.stdout.write(
+            f"{self._clear}✔ Completed: {meta.filename}\n"
+            f"   ├─ Size:  {meta.total_str}\n"
+            f"   ├─ Time:  {total_time:.2f}s\n"
+            f"   └─ Speed: {format_bytes(avg_speed)}/s\n"
+        )
+
+    def _print_engineering_report(self, meta, total_time, avg_speed, sys_stats):
+        filename = meta.filename
+        peak_speed = meta.peak_speed
+
+        # 🔥 Fix: If transfer was too fast to get samples, fallback Peak to Average
+        if meta.n == 0 or peak_speed == 0:
+            peak_speed = avg_speed
+        
+        # 1. Stability Calculation
+        stability_str = "N/A"
+        if meta.n > 1:
+            stdev = math.sqrt(meta.M2 / (meta.n - 1))
+            mean = meta.mean
+            if mean > 0:
+                cv = stdev / mean
+                stability = max(0, (1 - cv) * 100)
+                stability_str = f"{stability:.1f}%"
+
+        # 2. Resource & Diagnosis Formatting
+        cpu_usage_str = "N/A"
+        ram_usage_str = "N/A"
+        verdict = "Healthy"
+
+        if sys_stats:
+            cpu_val = sys_stats['avg_cpu']
+            ram_val_mb = sys_stats['avg_mem'] / (1024 * 1024)
+            
+            cpu_usage_str = f"{cpu_val:.1f}%"
+            ram_usage_str = f"{ram_val_mb:.2f} MB"
+
+            # Diagnosis Logic
+            if cpu_val > 90: verdict = "CPU Bound"
+            elif cpu_val < 10 and avg_speed < 1_000_000: verdict = "IO/Net Bound"
+
+        # 3. Print Clean Minimalist Report (No Color)
+        sys.stdout.write(
+            f"{self._clear}✔ Completed: {filename}\n"
+            f"   ├─ Size:      {meta.total_str}\n"
+            f"   ├─ Time:      {total_time:.4f}s\n"
+            f"   ├─ Speed:     {format_bytes(avg_speed)}/s (Peak: {format_bytes(peak_speed)}/s)\n"
+            f"   ├─ Stability: {stability_str}\n"
+            f"   ├─ Resource:  CPU {cpu_usage_str} | RAM {ram_usage_str}\n"
+            f"   └─ Diagnosis: {verdict}\n"
+        )
+
+    def on_error(self, task_id, error_msg):
+        sys.stdout.write(f"{self._clear}\n! Error {task_id}: {error_msg}\n")
+        sys.stdout.flush()
+        self._end_task(task_id)
+
+    def on_reject(self, task_id, reason):
+        sys.stdout.write(f"{self._clear}\n🚫 Rejected: {task_id} - {reason}\n")
+        sys.stdout.flush()
+        self._end_task(task_id)
+
+    def print_system(self, msg):
+        """Print a one-line system message (plain text, no Rich markup)."""
+        sys.stdout.write(f"{self._sys_prefix}{msg}\n")
+        sys.stdout.flush()
+
+    def print_banner(self):
+        art = """
+      ( (
+       ) )
+    ........
+    |      |]  [bold green]DropTea[/]
+    \\      /   [dim]Rust Core v1.0[/]
+     `----' 
+    """
+        self.console.print(Panel(art, border_style="green", expand=False))
\ No newline at end of file
@@ -0,0 +1,158 @@
+import logging
+import sys
+import os
+import json
+import time
+import copy
+import queue
+import atexit
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+# orjson is optional; fall back to the stdlib encoder when it isn't installed
+try:
+    import orjson
+    def _dumps(obj): return orjson.dumps(obj).decode()
+except ImportError:
+    _dumps = json.dumps
+
+# Same layout json.dumps would produce for the old dict; every string field
+# goes through _dumps, only lineno is dropped in as a plain int. (orjson
+# writes non-ASCII as UTF-8 rather than \uXXXX escapes.)
+_JSON_TEMPLATE = '{"timestamp": %s, "level": %s, "logger": %s, "message": %s, "module": %s, "line": %d'
+
+class JsonFormatter(logging.Formatter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._time_cache = (None, "")
+
+    def formatTime(self, record, datefmt=None):
+        # Timestamps have second resolution: reuse the string for a burst of
+        # records within the same second instead of calling strftime each time
+        if not datefmt: return super().formatTime(record, datefmt)
+        sec = int(record.created)
+        cached_sec, cached_str = self._time_cache
+        if sec == cached_sec: return cached_str
+        formatted = time.strftime(datefmt, self.converter(sec))
+        self._time_cache = (sec, formatted)
+        return formatted
+
+    def format(self, record):
+        # Handlers format the same record one after another; compute
+        # msg % args and the timestamp once and keep them on the record
+        msg = getattr(record, '_cached_msg', None)
+        if msg is None:
+            msg = record._cached_msg = record.getMessage()
+        ts = getattr(record, '_cached_time', None)
+        if ts is None:
+            ts = record._cached_time = self.formatTime(record, self.datefmt)
+        # exc_text is the stdlib's shared cache, so the traceback is rendered once
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            msg = f"{msg}\n{record.exc_text}"
+
+        line = _JSON_TEMPLATE % (
+            _dumps(ts),
+            _dumps(record.levelname),
+            _dumps(record.name),
+            _dumps(msg),
+            _dumps(record.module),
+            record.lineno,
+        )
+        if hasattr(record, 'task_id'):
+            return f'{line}, "task_id": {_dumps(record.task_id)}}}'
+        return line + "}"
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler with a 64 KB write buffer, flushed on WARNING+ records.
+
+    The stock handler flushes after every record and calls tell() (which also
+    flushes) to decide on rollover, so here the file size is tracked in memory.
+    """
+    def __init__(self, *args, buffer_size=64 * 1024, **kwargs):
+        self.buffer_size = buffer_size
+        self._size = 0
+        super().__init__(*args, **kwargs)
+
+    def _open(self):
+        # errors only exists on FileHandler from 3.9 on
+        stream = open(self.baseFilename, self.mode, buffering=self.buffer_size,
+                      encoding=self.encoding, errors=getattr(self, 'errors', None))
+        self._size = os.path.getsize(self.baseFilename)
+        return stream
+
+    def shouldRollover(self, record, length=None):
+        if self.maxBytes <= 0: return False
+        # emit() passes the length of the line it already formatted
+        if length is None: length = len(self.format(record)) + len(self.terminator)
+        # Counted in characters, not bytes: close enough for a rotation threshold
+        return self._size + length >= self.maxBytes
+
+    def emit(self, record):
+        try:
+            msg = self.format(record) + self.terminator
+            if self.stream is None: self.stream = self._open()
+            if self.shouldRollover(record, len(msg)): self.doRollover()
+            if self.stream is None: self.stream = self._open()
+            self.stream.write(msg)
+            self._size += len(msg)
+            if record.levelno >= logging.WARNING: self.stream.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves traceback formatting to the listener thread.
+
+    The stock prepare() renders exc_info into the message on the calling
+    thread; here only msg % args is resolved and exc_info travels as-is.
+    """
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+def setup_logging(log_filename="logs/app.jsonl", debug_mode=False, max_size_mb=10, backup_count=5):
+    log_folder = os.path.dirname(log_filename)
+    if log_folder:
+        os.makedirs(log_folder, exist_ok=True)
+
+    logger = logging.getLogger()
+    
+    root_level = logging.DEBUG if debug_mode else logging.INFO
+    logger.setLevel(root_level)
+    
+    if logger.hasHandlers(): return logger
+
+    file_formatter = JsonFormatter(datefmt='%Y-%m-%d %H:%M:%S')
+    file_handler = BufferedRotatingFileHandler(log_filename, maxBytes=max_size_mb*1024*1024, backupCount=backup_count, encoding='utf-8')
+    file_handler.setFormatter(file_formatter)
+    
+    console_formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(name)s: %(message)s', datefmt='%H:%M:%S')
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(console_formatter)
+    console_handler.setLevel(logging.INFO) 
+
+    # Callers (including the Rust callback thread) only enqueue the record;
+    # JSON formatting and disk writes happen on the listener thread
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop) # drains whatever is still queued
+    logger.addHandler(DeferredQueueHandler(log_queue))
+    logger.queue_listener = listener
+    
+    rust_log_level = logging.DEBUG if debug_mode else logging.WARNING
+    
+    logging.getLogger("droptea_core").setLevel(rust_log_level)
+    logging.getLogger("mdns_sd").setLevel(rust_log_level)
+    logging.getLogger("dns_parser").setLevel(rust_log_level)
+    logging.getLogger("asyncio").setLevel(rust_log_level)
+    logging.getLogger("zeroconf").setLevel(rust_log_level)
+
+    if debug_mode:
+        print(f"🔧 DEBUG MODE: ENABLED (Verbose logs -> {log_filename})")
+
+    return logger
\ No newline at end of file
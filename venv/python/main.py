@@ -0,0 +1,379 @@
+import sys
+import asyncio
+import argparse
+import logging
+import os
+import ctypes
+import concurrent.futures
+
+from rich.console import Console
+from prompt_toolkit import PromptSession
+from prompt_toolkit.history import InMemoryHistory
+from prompt_toolkit.formatted_text import HTML
+from prompt_toolkit.patch_stdout import patch_stdout
+
+from droptea_core import DropTeaEngine, send_handshake
+from logger_config import setup_logging
+from cli_adapter import CLITransferUI
+from transfer_manager import AsyncTransferManager, detect_peer_os
+from network_service import AsyncReceiver, PROTOCOL_PREFIX_REQUEST, PROTOCOL_PREFIX_START
+
+def enable_windows_virtual_terminal():
+    if sys.platform == "win32":
+        try:
+            kernel32 = ctypes.windll.kernel32
+            hOut = kernel32.GetStdHandle(-11)
+            out_mode = ctypes.c_ulong()
+            kernel32.GetConsoleMode(hOut, ctypes.byref(out_mode))
+            new_mode = out_mode.value | 0x0004
+            kernel32.SetConsoleMode(hOut, new_mode)
+        except Exception: pass
+
+enable_windows_virtual_terminal()
+
+logger = logging.getLogger("Main")
+console = Console()
+
+active_peers = {}
+# peer ids in discovery order, kept in step with active_peers so 'drop <idx>'
+# can index directly instead of materialising list(active_peers) per command
+peer_order = []
+startup_future = None
+
+# Peer table updates run on the event loop (scheduled from the Rust thread),
+# so input_loop never sees active_peers and peer_order out of step
+def _add_peer(peer_id, info):
+    if peer_id not in active_peers: peer_order.append(peer_id)
+    active_peers[peer_id] = info
+
+def _remove_peer(peer_id):
+    if active_peers.pop(peer_id, None) is not None: peer_order.remove(peer_id)
+
+# ✅ เพิ่มฟังก์ชัน Helper ที่ขาดหายไปกลับเข้ามา (แก้ NameError)
+def rust_cert_callback(*args) -> bool:
+    # Callback นี้จะถูกเรียกถ้า Rust ต้องการให้ User ยืนยัน Certificate
+    return True
+
+# Built once: one hashed lookup per filename instead of rebuilding lists
+_EXT_ICON = dict.fromkeys(('jpg', 'jpeg', 'png', 'gif', 'webp'), "🖼️")
+_EXT_ICON.update(dict.fromkeys(('mp4', 'mov', 'avi', 'mkv'), "🎬"))
+_EXT_ICON.update(dict.fromkeys(('mp3', 'wav', 'flac'), "🎵"))
+_EXT_ICON.update(dict.fromkeys(('zip', 'rar', '7z', 'tar', 'gz'), "📦"))
+_EXT_ICON.update(dict.fromkeys(('pdf', 'doc', 'docx', 'txt'), "📄"))
+
+def get_file_icon(filename):
+    _, dot, ext = filename.rpartition('.')
+    return _EXT_ICON.get(ext.lower(), "📁") if dot else "📁"
+
+def get_os_icon(os_name):
+    os_name = os_name.lower()
+    if "win" in os_name: return "🪟 Windows"
+    if "mac" in os_name or "darwin" in os_name: return "🍎 macOS"
+    if "linux" in os_name: return "🐧 Linux"
+    return "💻 Device"
+
+# (unit, divisor, format) indexed by (bit_length - 1) // 10
+_SIZE_UNITS = (("B", 1, "{:.0f} {}"), ("KB", 1024, "{:.1f} {}"), ("MB", 1024**2, "{:.2f} {}"), ("GB", 1024**3, "{:.2f} {}"))
+# Static Panel options for the request panel, built on first use (see print_file_request)
+_request_panel_kw = None
+
+def print_file_request(console, filename, filesize, sender_name, sender_device):
+    global _request_panel_kw
+    # Only needed once a request arrives; keeps them off the startup path
+    from rich.panel import Panel
+    from rich.table import Table
+    from rich.align import Align
+    if _request_panel_kw is None:
+        from rich import box
+        _request_panel_kw = dict(
+            title="[bold green]📨 Incoming Request[/]", 
+            border_style="green",
+            box=box.ROUNDED,
+            padding=(1, 4),
+            subtitle="[bold white]Type 'y' to accept or 'n' to decline[/]"
+        )
+
+    idx = min((filesize.bit_length() - 1) // 10, 3) if filesize > 0 else 0
+    unit, div, fmt = _SIZE_UNITS[idx]
+    size_str = fmt.format(filesize / div, unit)
+
+    file_icon = get_file_icon(filename)
+    os_icon = get_os_icon(sender_device)
+
+    grid = Table.grid(expand=True, padding=(0, 2))
+    grid.add_column(justify="right", style="dim", width=12)
+    grid.add_column(justify="left")
+    grid.add_row("From:", f"[bold cyan]{sender_name}[/]")
+    grid.add_row("Device:", f"[magenta]{os_icon}[/]")
+    grid.add_row("File:", f"{file_icon}  [bold yellow]{filename}[/]")
+    grid.add_row("Size:", f"[green]{size_str}[/]")
+
+    console.print(Panel(Align.center(grid), **_request_panel_kw))
+
+class RustDiscoveryAdapter:
+    def __init__(self): self.peers = active_peers
+
+class RustEventHandler:
+    def __init__(self, receiver, ui, loop):
+        self.receiver = receiver; self.ui = ui; self.loop = loop
+        # task_id -> Future the Rust callback thread blocks on until the user answers
+        self._pending = {}
+        # Incoming requests handed to input_loop, which races them against the prompt
+        self.requests = asyncio.Queue()
+
+    def resolve(self, task_id, decision):
+        fut = self._pending.pop(task_id, None)
+        if fut is None: return
+        # Lost the race against the request timeout; nothing left to answer
+        try: fut.set_result(decision)
+        except concurrent.futures.InvalidStateError: pass
+
+    def handle_incoming_request(self, task_id, filename, filesize, sender_name, sender_device):
+        try: fsize_int = int(filesize)
+        except: fsize_int = 0
+
+        fut = concurrent.futures.Future()
+        self._pending[task_id] = fut
+        self.loop.call_soon_threadsafe(
+            self.requests.put_nowait, (task_id, filename, fsize_int, sender_name, sender_device, fut)
+        )
+        
+        try:
+            return fut.result(timeout=60)
+        except concurrent.futures.TimeoutError:
+            # Completing the future also wakes input_loop so it drops the prompt
+            self.resolve(task_id, False)
+            return fut.result()
+
+    def __call__(self, *args):
+        global startup_future
+        if not args: return
+        event_type = args[0]
+
+        if event_type == "SERVER_STARTED":
+            if startup_future and not startup_future.done():
+                self.loop.call_soon_threadsafe(startup_future.set_result, True)
+            self.receiver._rust_callback(event_type, args[1], args[2])
+            return
+        elif event_type == "ERROR" and args[1] == "system" and "Startup failed" in args[2]:
+            if startup_future and not startup_future.done():
+                self.loop.call_soon_threadsafe(startup_future.set_result, False)
+            return
+
+        if len(args) >= 3:
+            task_id, data = args[1], args[2]
+            
+            if event_type == "Incoming" and data.startswith(PROTOCOL_PREFIX_REQUEST):
+                try:
+                    # One bounded split; the prefix lands in parts[0]
+                    parts = data.split('|', 4)
+                    if len(parts) == 5:
+                        self.handle_incoming_request(task_id, parts[1], parts[2], parts[3], parts[4])
+                        return 
+                except Exception as e:
+                    logger.error(f"Failed to parse incoming request: {e}")
+
+            if event_type == "Incoming" and data.startswith(PROTOCOL_PREFIX_START):
+                 self.resolve(task_id, True)
+
+            if event_type == "PEER_FOUND":
+                try: 
+                    parts = data.split('|', 4)
+                    if len(parts) >= 3:
+                        name, ip, port = parts[0], parts[1], int(parts[2])
+                        ssid = parts[3] if len(parts) > 3 else "?"
+                        transport = parts[4] if len(parts) > 4 else "LAN"
+                        self.loop.call_soon_threadsafe(_add_peer, task_id, {
+                            'name': name, 'ip': ip, 'port': port, 'ssid': ssid, 'transport': transport,
+                            'os': detect_peer_os(name)
+                        })
+                except: pass
+
+            elif event_type == "PEER_LOST":
+                self.loop.call_soon_threadsafe(_remove_peer, task_id)
+            
+            self.receiver._rust_callback(event_type, task_id, data)
+
+async def _prompt(session, message):
+    # Prompts are raced as Tasks, and a KeyboardInterrupt raised inside a Task
+    # escapes the event loop; turn Ctrl-C/Ctrl-D into None here instead
+    try: return await session.prompt_async(message)
+    except (EOFError, KeyboardInterrupt): return None
+
+async def answer_request(session, ui, engine, event_handler, request):
+    task_id, filename, filesize, sender_name, sender_device, fut = request
+    if fut.done(): return # timed out while queued
+
+    # Hold progress rendering while the request panel and prompt are up
+    receiver = event_handler.receiver
+    receiver.set_ui_visible(False)
+    try:
+        print_file_request(ui.console, filename, filesize, sender_name, sender_device)
+        ans_task = asyncio.ensure_future(_prompt(session, HTML("<b><yellow>👉 Accept File? (y/n): </yellow></b>")))
+        await asyncio.wait((ans_task, asyncio.wrap_future(fut)), return_when=asyncio.FIRST_COMPLETED)
+        if not ans_task.done():
+            # Timed out (or answered elsewhere) while the prompt was up
+            ans_task.cancel()
+            await asyncio.gather(ans_task, return_exceptions=True)
+            return
+
+        answer = ans_task.result()
+        decision = answer is not None and answer.strip().lower() in ('y', 'yes', '')
+        engine.resolve_request(task_id, decision)
+        event_handler.resolve(task_id, decision)
+    finally:
+        receiver.set_ui_visible(True)
+
+async def input_loop(transfer_mgr, ui, engine, config_name, event_handler):
+    ui.print_banner()
+    ui.print_system(f"Identity: {engine.get_my_name()}")
+    ui.print_system(f"Config: {config_name}") 
+    
+    session = PromptSession(history=InMemoryHistory())
+    prompt = HTML(f"<b><green>DropTea</green></b> ({engine.get_my_name()}) > ")
+    # Outlives individual prompts so a request arriving mid-command isn't lost
+    req_task = None
+    
+    while True:
+        try:
+            if req_task is None: req_task = asyncio.ensure_future(event_handler.requests.get())
+            with patch_stdout():
+                cmd_task = asyncio.ensure_future(_prompt(session, prompt))
+                await asyncio.wait((cmd_task, req_task), return_when=asyncio.FIRST_COMPLETED)
+                if req_task.done():
+                    cmd_task.cancel()
+                    await asyncio.gather(cmd_task, return_exceptions=True)
+
+            if req_task.done():
+                request, req_task = req_task.result(), None
+                await answer_request(session, ui, engine, event_handler, request)
+                # A command entered in the same wake-up is run after the answer
+                if not cmd_task.done() or cmd_task.cancelled(): continue
+
+            cmd = cmd_task.result()
+            if cmd is None: break # Ctrl-C / Ctrl-D
+
+            parts = cmd.strip().split()
+            if not parts: continue
+            
+            if parts[0] == "list":
+                if not active_peers: ui.console.print("[dim]No peers found yet...[/]")
+                else:
+                    # Render all rows in one print instead of one Console render per peer
+                    rows = [
+                        f"  [bold green]{i}[/] : {info['name']} [dim]({info['ip']}:{info['port']})[/]"
+                        for i, info in enumerate(active_peers.values())
+                    ]
+                    ui.console.print("\n".join(rows))
+            
+            elif parts[0] == "connect" and len(parts) >= 2:
+                target_mac = parts[1]
+                ui.console.print(f"[dim]👉 Connecting to {target_mac}...[/]")
+                try:
+                    await send_handshake(target_mac)
+                except Exception as e:
+                    ui.console.print(f"[red]❌ Connection Failed: {e}[/]")
+
+            elif parts[0] == "drop":
+                if len(parts) < 3:
+                    ui.console.print("[yellow]Usage: drop <index> <file_path>[/]")
+                    continue
+                try:
+                    idx = int(parts[1])
+                    path = " ".join(parts[2:]).strip("'\"")
+                    
+                    if 0 <= idx < len(peer_order):
+                        target_peer_id = peer_order[idx]
+                        # stat() off the event loop: a slow or network mount must not
+                        # stall progress events while we wait. isfile() also rejects
+                        # directories, which the engine can't open as a source file
+                        is_file = await asyncio.get_running_loop().run_in_executor(None, os.path.isfile, path)
+                        # The peer may have been lost while we waited on the stat
+                        peer = active_peers.get(target_peer_id)
+                        if peer is None:
+                            ui.console.print("[red]❌ Peer is no longer available (check 'list')[/]")
+                        elif is_file:
+                            basename = os.path.basename(path)
+                            await transfer_mgr.add_task(path, target_peer_id, basename=basename)
+                            ui.console.print(f"[green]🚀 Sending '{basename}' to {peer['name']}...[/]")
+                        else:
+                            ui.console.print(f"[red]❌ File not found: {path}[/]")
+                    else:
+                        ui.console.print("[red]❌ Invalid peer index (check 'list')[/]")
+                except ValueError:
+                    ui.console.print("[red]❌ Index must be a number[/]")
+                except Exception as e:
+                    ui.console.print(f"[red]❌ Error: {e}[/]")
+            
+            elif parts[0] == "exit": break
+        except (EOFError, KeyboardInterrupt): break
+
+    if req_task is not None: req_task.cancel()
+
+async def main():
+    global startup_future
+    args = parse_args()
+    
+    # ✅ 1. เลือกไฟล์ Config จาก args หรือใช้ default
+    config_path = args.config 
+    
+    if not os.path.exists(config_path):
+        console.print(f"[red]❌ Error: Config file '{config_path}' not found.[/]")
+        return
+
+    setup_logging(
+        log_filename=f"logs/{os.path.basename(config_path)}.jsonl",
+        debug_mode=args.verbose,
+        max_size_mb=10,
+        backup_count=5
+    )
+    
+    # 🔥 Updated: Pass args.verbose as dev_mode to enable Engineering Report
+    ui = CLITransferUI(console=console, dev_mode=args.verbose)
+    
+    main_loop = asyncio.get_running_loop()
+    shared_engine = DropTeaEngine()
+    
+    # ✅ rust_cert_callback ถูกประกาศแล้วก่อนหน้านี้ จึงไม่ Error
+    transfer_mgr = AsyncTransferManager(None, ui, engine=shared_engine, loop=main_loop, cert_verifier=rust_cert_callback) 
+    receiver = AsyncReceiver(ui, engine=shared_engine, loop=main_loop)
+    transfer_mgr.discovery = RustDiscoveryAdapter()
+
+    startup_future = main_loop.create_future()
+    ui.console.print(f"[dim]Starting Rust Core with [bold cyan]{config_path}[/]...[/]")
+    
+    event_handler = RustEventHandler(receiver, ui, main_loop)
+    try:
+        # ✅ 2. ส่ง Path ของ Config ที่เลือกลงไปให้ Rust
+        shared_engine.start_server(
+            config_path, 
+            event_handler
+        )
+        await startup_future 
+    except Exception as e:
+        ui.console.print(f"[red]❌ Failed to start Core: {e}[/]")
+        return
+    
+    worker = asyncio.create_task(transfer_mgr.start_worker())
+    try: await input_loop(transfer_mgr, ui, shared_engine, config_path, event_handler)
+    finally: worker.cancel()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="DropTea P2P File Transfer")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose logging")
+    
+    # ✅ 3. เพิ่ม Argument --config
+    parser.add_argument("-c", "--config", type=str, default="config/config.toml", help="Path to configuration file (default: config.toml)")
+    
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    if sys.platform == 'win32': asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    else:
+        # uvloop (optional) makes the per-event call_soon_threadsafe from the Rust thread cheaper
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError: pass
+    try: asyncio.run(main())
+    except KeyboardInterrupt: pass
\ No newline at end of file
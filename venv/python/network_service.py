@@ -0,0 +1,178 @@
+import logging
+import re
+import threading
+import collections
+from droptea_core import DropTeaEngine
+from utility import parse_progress
+
+logger = logging.getLogger("Receiver")
+
+PROTOCOL_PREFIX_REQUEST = "[[REQUEST]]|"
+PROTOCOL_PREFIX_START = "[[START]]|"
+_START_LEN = len(PROTOCOL_PREFIX_START)
+_TIMEOUT_RE = re.compile(r"deadline|time", re.IGNORECASE)
+# Minimum spacing between progress flushes to the UI (~30 Hz)
+_PROGRESS_FLUSH_INTERVAL = 0.033
+
+class AsyncReceiver:
+    def __init__(self, event_handler, engine=None, loop=None):
+        self.events = event_handler
+        # Resolve the per-event UI callbacks once instead of on every event
+        self._ui_progress = event_handler.on_progress
+        self._ui_status = event_handler.on_status_change
+        self._ui_error = event_handler.on_error
+        self.loop = loop 
+        # ✅ ไม่ต้องรับ save_path จาก config แล้ว Rust จัดการเอง
+        self.engine = engine if engine else DropTeaEngine()
+        # One dict lookup per event instead of walking an if/elif chain
+        self._handlers = {
+            "Incoming": self._on_incoming,
+            "START": self._on_start,
+            "PROGRESS": self._on_progress,
+            "COMPLETED": self._on_completed,
+            "ERROR": self._on_error,
+            "REJECTED": self._on_rejected,
+            "SERVER_STARTED": self._on_server_started,
+            "PEER_FOUND": self._on_peer_found,
+        }
+        # Events from the Rust thread are buffered here and drained in bursts,
+        # so the loop is woken once per burst rather than once per event
+        self._pending = collections.deque()
+        self._pending_lock = threading.Lock()
+        self._drain_scheduled = False
+        # PROGRESS is last-value-wins per task: only the newest (current, total)
+        # is kept and flushed to the UI at most once per interval
+        self._progress_latest = {}
+        self._flush_armed = False
+        self._flush_handle = None
+        self._last_flush_ts = 0.0
+        # False while a modal (e.g. an incoming request) owns the terminal;
+        # progress keeps coalescing but isn't rendered until it's shown again
+        self._ui_visible = True
+        # Handlers that end a task; its coalesced PROGRESS must be delivered first
+        self._terminal_handlers = {self._on_completed, self._on_error}
+
+    def _on_incoming(self, task_id, data):
+        # Engine events already arrive as str; skip the str() round-trip
+        str_data = data if type(data) is str else str(data)
+        
+        # Requests ([[REQUEST]]|...) are parsed and answered by RustEventHandler
+        # in main.py and never forwarded here
+        # ✅ เริ่มต้นส่ง (Start)
+        if str_data.startswith(PROTOCOL_PREFIX_START):
+            fname = str_data[_START_LEN:]
+            self.events.on_start(task_id, fname)
+        
+        # Ignore malformed data
+        elif " [from " in str_data: 
+            pass 
+        else:
+            logger.debug(f"Ignored malformed Incoming data: {str_data}")
+
+    def _on_start(self, task_id, data):
+        self.events.on_start(task_id, data)
+
+    def _on_progress(self, task_id, data):
+        try:
+            r = parse_progress(data)
+            if r: self._ui_progress(task_id, *r)
+        except: pass
+
+    def _on_completed(self, task_id, data):
+        self._ui_status(task_id, "COMPLETED")
+
+    def _on_error(self, task_id, data):
+        err_msg = data if type(data) is str else str(data)
+        if _TIMEOUT_RE.search(err_msg):
+            err_msg = "Timeout / No Response"
+        self._ui_error(task_id, err_msg)
+
+    def _on_rejected(self, task_id, data):
+        self.events.on_reject(task_id, (data if type(data) is str else str(data)))
+
+    def _on_server_started(self, task_id, data):
+        logger.info(data)
+
+    def _on_peer_found(self, task_id, data):
+        logger.debug(f"Peer: {data}")
+
+    def _rust_callback(self, event, task_id, data):
+        if event == "PROGRESS" and self.loop:
+            # Parse here on the Rust thread; it's cheap and keeps the loop free
+            r = parse_progress(data)
+            if not r: return
+            with self._pending_lock:
+                self._progress_latest[task_id] = r
+                if self._flush_armed: return
+                self._flush_armed = True
+            self.loop.call_soon_threadsafe(self._arm_flush)
+            return
+
+        handler = self._handlers.get(event)
+        if handler is None: return
+
+        if not self.loop:
+            self._pending.append((handler, task_id, data))
+            self._drain()
+            return
+
+        with self._pending_lock:
+            self._pending.append((handler, task_id, data))
+            if self._drain_scheduled: return
+            self._drain_scheduled = True
+        self.loop.call_soon_threadsafe(self._drain)
+
+    def _drain(self):
+        # Clear the flag before popping: anything appended after this point
+        # either gets popped below or schedules a fresh drain
+        with self._pending_lock:
+            self._drain_scheduled = False
+        # Dispatch in arrival order. Progress is only pulled forward for the task
+        # that is ending, so it can't overtake that task's still-queued START
+        pending = self._pending
+        while pending:
+            handler, task_id, data = pending.popleft()
+            if handler in self._terminal_handlers: self._flush_task_progress(task_id)
+            try: handler(task_id, data)
+            except Exception as e: logger.error(f"Callback error: {e}")
+
+    def _flush_task_progress(self, task_id):
+        # Delivered even while the UI is hidden: the final state must land
+        with self._pending_lock:
+            r = self._progress_latest.pop(task_id, None)
+        if r is None: return
+        try: self._ui_progress(task_id, *r)
+        except Exception as e: logger.error(f"Callback error: {e}")
+
+    def _arm_flush(self):
+        if self._flush_handle is not None: return
+        # Flush immediately if the UI has been idle long enough, else batch
+        elapsed = self.loop.time() - self._last_flush_ts
+        if elapsed >= _PROGRESS_FLUSH_INTERVAL:
+            self._flush_progress()
+        else:
+            self._flush_handle = self.loop.call_later(_PROGRESS_FLUSH_INTERVAL - elapsed, self._flush_progress)
+
+    def set_ui_visible(self, visible):
+        self._ui_visible = visible
+        # Flush whenever armed, even if a terminal event already took the last
+        # entry: flushing is what clears _flush_armed for later PROGRESS
+        if visible and self._flush_armed: self._flush_progress()
+
+    def _flush_progress(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        # Leave _flush_armed set while hidden so new PROGRESS only updates the
+        # latest values; set_ui_visible(True) flushes them
+        if not self._ui_visible: return
+        with self._pending_lock:
+            latest = self._progress_latest
+            self._progress_latest = {}
+            self._flush_armed = False
+        self._last_flush_ts = self.loop.time()
+        for task_id, (current, total) in latest.items():
+            try: self._ui_progress(task_id, current, total)
+            except Exception as e: logger.error(f"Callback error: {e}")
+    
+    # ❌ ลบฟังก์ชัน start() ออก เพราะ main.py เป็นคนสั่ง start_server เองแล้ว
\ No newline at end of file
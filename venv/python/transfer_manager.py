@@ -0,0 +1,153 @@
+import asyncio
+import os
+import re
+import logging
+import collections
+from typing import Dict, Optional
+from droptea_core import DropTeaEngine
+from events import TransferEvents
+from utility import parse_progress
+
+logger = logging.getLogger("TransferManager")
+
+# Max transfers handed to the engine per send_files_batch call
+_SEND_BATCH_MAX = 16
+
+# One anchored scan; the ios branch is tried first so a name containing both
+# "iphone"/"ipad" and "mac" still resolves to ios, as the old if-chain did
+_OS_RE = re.compile(r"(?P<ios>.*(?:iphone|ipad))|(?P<macos>.*mac)", re.IGNORECASE | re.DOTALL)
+
+def detect_peer_os(peer_name):
+    """Guess the target OS from a peer's device name (None if unknown)."""
+    # ถ้าชื่อเครื่องมีคำว่า iphone หรือ ipad ให้ถือว่าเป็น iOS
+    m = _OS_RE.match(peer_name)
+    return m.lastgroup if m else None
+
+class TransferTask:
+    # Plain __slots__ class: dataclass(slots=True) needs 3.10, and a slotted
+    # dataclass can't carry the target_os default on 3.8. The queue is a FIFO
+    # deque, so tasks are never compared and no ordering is defined
+    __slots__ = ("priority", "file_path", "peer_ip", "peer_port", "task_id", "target_os")
+
+    def __init__(self, priority: int, file_path: str, peer_ip: str, peer_port: int, task_id: str,
+                 target_os: Optional[str] = None):
+        self.priority = priority
+        self.file_path = file_path
+        self.peer_ip = peer_ip; self.peer_port = peer_port
+        self.task_id = task_id
+        # 🔥 1. เพิ่ม field นี้เพื่อระบุ OS ปลายทาง
+        self.target_os = target_os
+
+    def __repr__(self):
+        return f"TransferTask(priority={self.priority!r}, file_path={self.file_path!r}, task_id={self.task_id!r})"
+
+class AsyncTransferManager:
+    def __init__(self, discovery_service, event_handler: TransferEvents, device_name="Unknown", engine=None, loop=None, cert_verifier=None):
+        # Single producer (add_task) and single consumer (start_worker) on the
+        # same loop: a deque plus a wake-up Event is all the queue needs
+        self.queue = collections.deque()
+        self._wake = asyncio.Event()
+        self.discovery = discovery_service
+        self.events = event_handler
+        # Resolve the per-event UI callbacks once instead of on every event
+        self._ui_progress = event_handler.on_progress
+        self._ui_status = event_handler.on_status_change
+        self._ui_error = event_handler.on_error
+        self.active_tasks = {}
+        self.device_name = device_name
+        self.loop = loop
+        self.engine = engine if engine else DropTeaEngine()
+        self.cert_verifier = cert_verifier 
+        self._running = True
+        self._handlers = {
+            "START": self._on_start,
+            "PROGRESS": self._on_progress,
+            "COMPLETED": self._on_completed,
+            "ERROR": self._on_error,
+        }
+
+    def _on_start(self, task_id, data):
+        self.events.on_start(task_id, (data if type(data) is str else str(data)))
+
+    def _on_progress(self, task_id, data):
+        try:
+            r = parse_progress(data)
+            if r: self._ui_progress(task_id, *r)
+        except: pass
+
+    def _on_completed(self, task_id, data):
+        self._ui_status(task_id, "COMPLETED")
+
+    def _on_error(self, task_id, data):
+        self._ui_error(task_id, (data if type(data) is str else str(data)))
+
+    def _rust_callback(self, *args):
+        try:
+            if not args: return
+            event = args[0]
+
+            if event == "ask_verify_certificate":
+                if self.cert_verifier:
+                    return self.cert_verifier(*args)
+                return False 
+
+            if len(args) < 3: return
+            handler = self._handlers.get(event)
+            if handler: handler(args[1], args[2])
+
+        except Exception as e:
+            logger.error(f"Callback error: {e}")
+
+    async def add_task(self, file_path, peer_name, basename=None):
+        if not self.discovery: 
+            self.events.on_error("system", "Discovery service not ready")
+            return
+        
+        peer_info = self.discovery.peers.get(peer_name)
+        if not peer_info: 
+            self.events.on_error("system", f"Peer {peer_name} not found")
+            return
+
+        task_id = basename or os.path.basename(file_path)
+        
+        # 🔥 2. เพิ่ม Logic ตรวจสอบ OS จากชื่อเครื่อง (Heuristic)
+        # detected once per peer at discovery time, see detect_peer_os()
+        detected_os = None
+        if isinstance(peer_info, dict): 
+            ip, port = peer_info['ip'], peer_info['port']
+            detected_os = peer_info.get('os')
+        else: 
+            ip, port = peer_info
+
+        # สร้าง Task โดยระบุ target_os ไปด้วย
+        task = TransferTask(10, file_path, ip, port, task_id, target_os=detected_os)
+        self.queue.append(task)
+        self._wake.set()
+        self.active_tasks[task_id] = task
+        
+        if hasattr(self.events, 'on_task_queued'):
+             self.events.on_task_queued(task_id, task_id, "Waiting...")
+        else:
+             self.events.on_task_added(task_id, task_id, side="SEND")
+
+    async def start_worker(self):
+        while self._running:
+            if not self.queue:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            # Drain everything queued since the last wake, up to _SEND_BATCH_MAX
+            # tasks per crossing into the engine. send_files_batch only spawns
+            # the transfers on the Rust runtime and returns, so no executor is needed.
+            queue = self.queue
+            while queue:
+                batch = [queue.popleft() for _ in range(min(len(queue), _SEND_BATCH_MAX))]
+                
+                # 🔥 3. ส่ง task.target_os ไปให้ Rust
+                # (ถ้าเป็น "ios" Rust จะรู้ทันทีว่าต้องส่งแบบ Raw)
+                self.engine.send_files_batch(
+                    [(t.peer_ip, t.peer_port, t.file_path, t.task_id, t.target_os) for t in batch],
+                    self._rust_callback,
+                    self.device_name
+                )
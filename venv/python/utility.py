@@ -0,0 +1,93 @@
+import socket
+import asyncio
+import shutil, sys, time, os
+import concurrent.futures
+from functools import partial
+from droptea_core import compress_folder, extract_zip 
+
+_UNITS = ('', 'K', 'M', 'G', 'T', 'P')
+# [columns, next refresh time]: the terminal size is re-queried at most once a second
+_TERM_W = [80, 0]
+# Bars are sliced out of these instead of repeating the glyphs every frame
+_BAR_MAX = 256
+_FILL = "█" * _BAR_MAX
+_EMPTY = "░" * _BAR_MAX
+
+def format_bytes(size):
+    # Unit index straight from the bit length: each unit is 10 bits wide
+    n = min(max(0, (int(size).bit_length() - 1) // 10), len(_UNITS) - 1)
+    return f"{size / (1 << (10 * n)):.2f} {_UNITS[n]}B"
+
+def parse_progress(data):
+    """Decode a PROGRESS payload: "current|total" from the engine, or a (current, total) pair.
+
+    Anything else, including malformed payloads, returns None instead of raising.
+    """
+    if type(data) is str:
+        head, sep, tail = data.partition("|")
+        if sep and head.isdecimal() and tail.isdecimal():
+            return int(head), int(tail)
+        return None
+    if type(data) in (tuple, list) and len(data) == 2:
+        current, total = data
+        if type(current) is int and type(total) is int:
+            # A ready-made tuple is passed through as-is, no new tuple
+            return data if type(data) is tuple else (current, total)
+    return None
+
+def get_free_port(start_port=8080, max_tries=100):
+    for port in range(start_port, start_port + max_tries):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            try:
+                s.bind(('0.0.0.0', port))
+                return port
+            except OSError:
+                continue
+    raise OSError(f"No free ports found in range {start_port}-{start_port + max_tries}")
+
+def draw_ascii_bar(current, total, filename, speed_bps=0, elapsed=0, total_str=None, last_frame=None, flush=True):
+    """Draw one progress frame and return it; skips the write if it equals last_frame."""
+    if total <= 0: return last_frame
+
+    percent = current / total
+    now_ns = time.monotonic_ns()
+    if now_ns >= _TERM_W[1]:
+        _TERM_W[0] = shutil.get_terminal_size().columns
+        _TERM_W[1] = now_ns + 1_000_000_000
+    term_width = _TERM_W[0]
+    bar_width = min(max(10, term_width - 65), _BAR_MAX)
+    
+    filled_len = int(bar_width * percent)
+    bar = _FILL[:filled_len] + _EMPTY[:bar_width - filled_len]
+    
+    if len(filename) > 15:
+        filename = filename[:12] + "..."
+
+    # One f-string: the pieces are joined in a single BUILD_STRING with no
+    # intermediate percent/progress/speed/time strings
+    output = (
+        f"\r{filename} "
+        f"[{bar}] {int(percent * 100)}% "
+        f"| {format_bytes(current)}/{total_str or format_bytes(total)} "
+        f"| {format_bytes(speed_bps)}/s "
+        f"| {int(elapsed)}s"
+    )
+    
+    frame = output.ljust(term_width - 1)
+    if frame == last_frame: return frame
+    sys.stdout.write(frame)
+    if flush: sys.stdout.flush()
+    return frame
+    
+# Archive work gets its own pool so a long compress can't starve the default
+# executor's quick stat()/IO calls. The core releases the GIL for these, so
+# threads run them in parallel without the pickling cost of a process pool.
+_CPU_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="droptea-cpu")
+
+async def async_compress_folder(folder_path, output_path):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_CPU_POOL, partial(compress_folder, folder_path, output_path))
+
+async def async_extract_zip(zip_path, extract_to):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_CPU_POOL, partial(extract_zip, zip_path, extract_to))
\ No newline at end of file